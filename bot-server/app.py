@@ -1,43 +1,146 @@
 from flask import Flask, request, jsonify
+from flask.json.provider import JSONProvider
 import requests
-import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import Future, ThreadPoolExecutor
+from collections import OrderedDict
+import functools
+import hashlib
+import threading
+import orjson
+import fastjsonschema
 import argparse
+import os
+import queue
 import time
 import re
 
+class OrjsonProvider(JSONProvider):
+    """Serialize Flask JSON with orjson, compact and unsorted"""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj), mimetype='application/json')
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
+
+SCHEMA_SERVICE_URL = os.environ.get('SCHEMA_SERVICE_URL', 'http://schema-service:5001')
+VALUES_SERVICE_URL = os.environ.get('VALUES_SERVICE_URL', 'http://values-service:5002')
+OLLAMA_URL = os.environ.get('OLLAMA_URL', 'http://ollama:11434')
+
+# 4-bit quantized build: fewer bytes per weight read per decoded token
+MODEL_NAME = os.environ.get('OLLAMA_MODEL', 'llama3.2:3b-instruct-q4_K_M')
+
+# Context window bounds; num_ctx only ever grows between them (see context_size)
+MIN_NUM_CTX = 2048
+MAX_NUM_CTX = 131072
+_num_ctx = MIN_NUM_CTX
+_NUM_CTX_LOCK = threading.Lock()
+
+# First Ollama release that accepts a JSON Schema as the `format` value
+STRUCTURED_OUTPUTS_VERSION = (0, 5, 0)
+
+# Keep the model (and its prompt KV cache) resident between requests
+OLLAMA_KEEP_ALIVE = '30m'
+
+# Decode budget for configuration changes and the text that ends them early.
+# "```" is deliberately absent: the model often opens its answer with a fence.
+MAX_CHANGE_TOKENS = 4096
+MIN_CHANGE_TOKENS = 256
+CHANGE_STOP_SEQUENCES = ['\n\n\n', '\nNote:', '\nExplanation']
+
+# Shared keep-alive session so outbound calls reuse pooled connections
+SESSION = requests.Session()
+SESSION.headers.update({'Connection': 'keep-alive'})
+SESSION.mount('http://', HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=64,
+    max_retries=Retry(total=2, backoff_factor=0.1)
+))
+
+# Known applications, in the order they win when a request mentions several
+APP_NAMES = ('tournament', 'matchmaking', 'chat')
+_APP_RE = re.compile('|'.join(APP_NAMES))
+_CLEAN = re.compile(r'[^a-z]')
+_JSON_TOKEN_RE = re.compile(r'[{}"\\]')
+
+# Worker pool for overlapping independent outbound fetches
+EXECUTOR = ThreadPoolExecutor(max_workers=8)
 
-SCHEMA_SERVICE_URL = 'http://schema-service:5001'
-VALUES_SERVICE_URL = 'http://values-service:5002'
-OLLAMA_URL = 'http://ollama:11434'
+# Requests the LLM could not map to an application, remembered for a while
+UNKNOWN_INPUT_TTL = 300
+UNKNOWN_INPUT_MAX = 1024
+_UNKNOWN_INPUTS = {}
+_UNKNOWN_INPUTS_LOCK = threading.Lock()
 
-def wait_for_ollama(max_retries=30, delay=2):
-    """Wait for Ollama service to be ready"""
+# Updated configurations keyed by (app, schema digest, values digest, request)
+CHANGE_CACHE_MAX = 256
+_CHANGE_CACHE = OrderedDict()
+_CHANGE_CACHE_LOCK = threading.Lock()
+
+# Application the most recent request resolved to, used as a prefetch guess
+_last_app_name = None
+
+# Last 200 response per URL, revalidated with conditional GETs
+_CONDITIONAL_CACHE = {}
+
+# Prompt prefix per application, keyed by app name: (schema_bytes, prefix)
+_PROMPT_PREFIXES = {}
+
+# Parsed schema used as the Ollama output format, keyed by app name: (schema_bytes, schema)
+_OUTPUT_FORMATS = {}
+
+# Compiled schema validators keyed by sha1 of the schema bytes (None if uncompilable)
+_VALIDATORS = {}
+
+class UnidentifiedApplication(Exception):
+    """Raised when the LLM answer names none of the known applications"""
+
+def wait_for_ollama(max_wait=60, initial_delay=0.1, max_delay=2.0):
+    """
+    Wait for Ollama service to be ready
+    
+    Polls immediately, then backs off exponentially from initial_delay up to
+    max_delay between probes, giving up after max_wait seconds.
+    """
     print("Waiting for Ollama service to be ready...")
-    for i in range(max_retries):
+    deadline = time.monotonic() + max_wait
+    attempt = 0
+    while True:
         try:
-            response = requests.get(f'{OLLAMA_URL}/api/tags', timeout=5)
+            response = SESSION.get(f'{OLLAMA_URL}/api/tags', timeout=1)
             if response.status_code == 200:
                 print("Ollama service is ready!")
                 return True
         except requests.exceptions.RequestException:
             pass
         
-        if i < max_retries - 1:
-            print(f"Ollama not ready yet, retrying in {delay} seconds... ({i+1}/{max_retries})")
-            time.sleep(delay)
+        delay = min(max_delay, initial_delay * (1.6 ** attempt))
+        attempt += 1
+        if time.monotonic() + delay > deadline:
+            break
+        print(f"Ollama not ready yet, retrying in {delay:.1f} seconds... (attempt {attempt})")
+        time.sleep(delay)
     
     print("WARNING: Ollama service did not become ready in time")
     return False
 
-def ensure_model_pulled(model_name='llama3.2'):
+def ensure_model_pulled(model_name=MODEL_NAME):
     """Ensure the LLM model is pulled and ready"""
     print(f"Checking if model '{model_name}' is available...")
     
     try:
-        response = requests.get(f'{OLLAMA_URL}/api/tags', timeout=10)
+        response = SESSION.get(f'{OLLAMA_URL}/api/tags', timeout=10)
         if response.status_code == 200:
-            models = response.json().get('models', [])
+            models = orjson.loads(response.content).get('models', [])
             model_exists = any(model_name in model.get('name', '') for model in models)
             
             if model_exists:
@@ -45,7 +148,7 @@ def ensure_model_pulled(model_name='llama3.2'):
                 return True
         
         print(f"Pulling model '{model_name}'... This may take a few minutes...")
-        pull_response = requests.post(
+        pull_response = SESSION.post(
             f'{OLLAMA_URL}/api/pull',
             json={'name': model_name},
             stream=True,
@@ -54,7 +157,7 @@ def ensure_model_pulled(model_name='llama3.2'):
         
         for line in pull_response.iter_lines():
             if line:
-                data = json.loads(line)
+                data = orjson.loads(line)
                 status = data.get('status', '')
                 if 'progress' in data:
                     print(f"  {status}: {data['progress']}")
@@ -68,6 +171,11 @@ def ensure_model_pulled(model_name='llama3.2'):
         print(f"Error ensuring model is available: {e}")
         return False
 
+def prepare_ollama():
+    """Wait for Ollama and make sure the model is pulled before serving traffic"""
+    if wait_for_ollama():
+        ensure_model_pulled()
+
 def identify_application(user_input):
     """
     Use LLM to identify which application the user wants to modify
@@ -78,88 +186,240 @@ def identify_application(user_input):
     Returns:
         Application name (chat, matchmaking, or tournament) or None
     """
-    user_lower = user_input.lower()
-    
-    if 'tournament' in user_lower:
-        print(f"Identified application via keyword: tournament")
-        return 'tournament'
-    elif 'matchmaking' in user_lower:
-        print(f"Identified application via keyword: matchmaking")
-        return 'matchmaking'
-    elif 'chat' in user_lower:
-        print(f"Identified application via keyword: chat")
-        return 'chat'
+    app_name = _match_application(user_input.lower())
+    if app_name:
+        print(f"Identified application via keyword: {app_name}")
+        return app_name
     
     print("No keyword match, using LLM for identification...")
     
-    prompt = f"""Identify the application from this request. Only respond with one word: chat, matchmaking, or tournament.
-
-Request: {user_input}
-
-Answer (one word only):"""
-
+    user_input_norm = user_input.strip().lower()
+    if _is_known_unidentifiable(user_input_norm):
+        print("Request was recently unidentifiable by LLM, skipping")
+        return None
+    
     try:
-        response = requests.post(
-            f'{OLLAMA_URL}/api/generate',
-            json={
-                'model': 'llama3.2',
-                'prompt': prompt,
-                'stream': False,
-                'options': {
-                    'temperature': 0.0,
-                    'num_predict': 10
-                }
-            },
-            timeout=120
-        )
-        
-        if response.status_code == 200:
-            result = response.json()
-            app_name = result.get('response', '').strip().lower()
-            
-            app_name = re.sub(r'[^a-z]', '', app_name)
-            
-            if 'tournament' in app_name:
-                print(f"LLM identified: tournament")
-                return 'tournament'
-            elif 'matchmaking' in app_name:
-                print(f"LLM identified: matchmaking")
-                return 'matchmaking'
-            elif 'chat' in app_name:
-                print(f"LLM identified: chat")
-                return 'chat'
-            
-            print(f"Could not identify application from LLM response: '{app_name}'")
-            return None
-        else:
-            print(f"Error from Ollama: {response.status_code}")
-            return None
-            
+        app_name = _llm_identify(user_input_norm)
+        print(f"LLM identified: {app_name}")
+        return app_name
+    except UnidentifiedApplication as e:
+        print(f"Could not identify application from LLM response: '{e}'")
+        _remember_unidentifiable(user_input_norm)
+        return None
     except Exception as e:
         print(f"Error identifying application: {e}")
         return None
 
-def apply_configuration_change(user_input, schema, current_values):
+@functools.lru_cache(maxsize=1024)
+def _llm_identify(user_input_norm):
     """
-    Use LLM to apply configuration changes to the values JSON
+    Ask the LLM which application a normalized request refers to
+    
+    Only successful answers are memoized; failures raise and are not cached.
     
     Args:
-        user_input: Natural language user request
-        schema: JSON Schema for the application
-        current_values: Current configuration values
+        user_input_norm: Stripped, lowercased user request
     
     Returns:
-        Updated values JSON or None
+        Application name (chat, matchmaking, or tournament)
+    
+    Raises:
+        UnidentifiedApplication: LLM answer named no known application
+    """
+    answer = _IDENTIFY_BATCHER.submit(user_input_norm).result()
+    app_name = answer.strip().lower()
+    
+    app_name = _CLEAN.sub('', app_name)
+    
+    matched = _match_application(app_name)
+    if matched:
+        return matched
+    
+    raise UnidentifiedApplication(app_name)
+
+def _identify_prompt(request_text):
+    """Build the single-request application identification prompt"""
+    return f"""Identify the application from this request. Only respond with one word: chat, matchmaking, or tournament.
+
+Request: {request_text}
+
+Answer (one word only):"""
+
+def _identify_batch_prompt(request_texts):
+    """Build one prompt that identifies the application for several requests"""
+    questions = '\n'.join(f'Q{i}: {text}' for i, text in enumerate(request_texts, 1))
+    return f"""Identify the application for each numbered request below. Each answer must be one word: chat, matchmaking, or tournament.
+
+{questions}
+
+Respond with ONLY a JSON object of the form {{"answers": ["...", ...]}} containing exactly {len(request_texts)} answers, in order."""
+
+class BatchedOllama:
+    """
+    Coalesce concurrent short prompts into a single Ollama generate call
+    
+    Requests submitted within max_wait_ms of each other (up to max_batch) are
+    sent as one numbered batch prompt and the JSON answers are split back out
+    to each caller. A lone request is sent with its normal prompt.
     """
-    prompt = f"""You are a configuration management assistant. Your task is to modify a JSON configuration based on a user's natural language request.
+    
+    def __init__(self, build_prompt, build_batch_prompt, num_predict, max_wait_ms=20, max_batch=8):
+        self.build_prompt = build_prompt
+        self.build_batch_prompt = build_batch_prompt
+        self.num_predict = num_predict
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+    
+    def submit(self, request_text):
+        """
+        Queue a request for the next batch
+        
+        Returns:
+            Future resolving to the model's raw answer text for this request
+        """
+        future = Future()
+        self._ensure_worker()
+        self._queue.put((request_text, future))
+        return future
+    
+    def _ensure_worker(self):
+        # Started lazily so it runs in the serving process, not at import time
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, daemon=True)
+                self._worker.start()
+    
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._dispatch(batch)
+    
+    def _dispatch(self, batch):
+        request_texts = [text for text, _ in batch]
+        try:
+            answers = self._answer(request_texts)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), answer in zip(batch, answers):
+            future.set_result(answer)
+    
+    def _answer(self, request_texts):
+        if len(request_texts) > 1:
+            print(f"Batching {len(request_texts)} requests into one LLM call")
+            try:
+                result = self._generate(
+                    self.build_batch_prompt(request_texts),
+                    self.num_predict * len(request_texts) + 32,
+                    output_format='json'
+                )
+                parsed = orjson.loads(_extract_json(result) or result)
+                answers = parsed.get('answers') if isinstance(parsed, dict) else parsed
+                if isinstance(answers, list) and len(answers) == len(request_texts):
+                    return [str(answer) for answer in answers]
+                print("Batched LLM answer did not match the requests, answering individually")
+            except orjson.JSONDecodeError as e:
+                print(f"Error parsing batched LLM answer, answering individually: {e}")
+        
+        return [self._generate(self.build_prompt(text), self.num_predict) for text in request_texts]
+    
+    def _generate(self, prompt, num_predict, output_format=None):
+        body = {
+            'model': MODEL_NAME,
+            'prompt': prompt,
+            'stream': False,
+            'keep_alive': OLLAMA_KEEP_ALIVE,
+            'options': {
+                'temperature': 0.0,
+                'num_predict': num_predict,
+                'num_ctx': context_size(prompt, num_predict)
+            }
+        }
+        if output_format:
+            body['format'] = output_format
+        
+        response = SESSION.post(f'{OLLAMA_URL}/api/generate', json=body, timeout=120)
+        if response.status_code != 200:
+            raise RuntimeError(f"Error from Ollama: {response.status_code}")
+        
+        return orjson.loads(response.content).get('response', '')
 
-User request: "{user_input}"
+_IDENTIFY_BATCHER = BatchedOllama(_identify_prompt, _identify_batch_prompt, num_predict=10)
 
-Current configuration (JSON):
-{json.dumps(current_values, indent=2)}
+def _match_application(text):
+    """
+    Find the application named in lowercased text with a single regex scan
+    
+    Returns:
+        Highest-priority application mentioned in text, or None
+    """
+    found = set(_APP_RE.findall(text))
+    for app_name in APP_NAMES:
+        if app_name in found:
+            return app_name
+    return None
+
+def _is_known_unidentifiable(user_input_norm):
+    """Check whether the LLM recently failed to identify this request"""
+    with _UNKNOWN_INPUTS_LOCK:
+        seen_at = _UNKNOWN_INPUTS.get(user_input_norm)
+        if seen_at is None:
+            return False
+        if time.monotonic() - seen_at < UNKNOWN_INPUT_TTL:
+            return True
+        del _UNKNOWN_INPUTS[user_input_norm]
+        return False
+
+def _remember_unidentifiable(user_input_norm):
+    """Record a request the LLM could not identify, evicting expired entries when full"""
+    now = time.monotonic()
+    with _UNKNOWN_INPUTS_LOCK:
+        if len(_UNKNOWN_INPUTS) >= UNKNOWN_INPUT_MAX:
+            for key, seen_at in list(_UNKNOWN_INPUTS.items()):
+                if now - seen_at >= UNKNOWN_INPUT_TTL:
+                    del _UNKNOWN_INPUTS[key]
+            if len(_UNKNOWN_INPUTS) >= UNKNOWN_INPUT_MAX:
+                del _UNKNOWN_INPUTS[next(iter(_UNKNOWN_INPUTS))]
+        _UNKNOWN_INPUTS[user_input_norm] = now
+
+def get_prompt_prefix(app_name, schema_bytes):
+    """
+    Return the static head of the configuration prompt for an application
+    
+    The head holds the instructions and the schema text so that
+    consecutive prompts for the same app share an identical prefix, letting
+    Ollama reuse its KV cache instead of re-evaluating those tokens. It is
+    rebuilt only when the fetched schema bytes change. The schema is spliced
+    in as served, without a parse/re-serialize round trip.
+    
+    Args:
+        app_name: Application name
+        schema_bytes: Raw JSON Schema as served by the schema service
+    
+    Returns:
+        Prompt prefix string
+    """
+    cached = _PROMPT_PREFIXES.get(app_name)
+    if cached and cached[0] == schema_bytes:
+        return cached[1]
+    
+    prefix = f"""You are a configuration management assistant. Your task is to modify a JSON configuration based on a user's natural language request.
 
 JSON Schema (for validation):
-{json.dumps(schema, indent=2)}
+{schema_bytes.decode('utf-8')}
 
 Instructions:
 1. Understand the user's request and identify what needs to be changed
@@ -173,53 +433,367 @@ Common patterns:
 - "set X cpu to Y" → modify resources.cpu.limitMilliCPU or requestMilliCPU  
 - "set X env to Y" → modify envs object
 - "lower/increase X by Y%" → calculate new value based on percentage
+"""
+    _PROMPT_PREFIXES[app_name] = (schema_bytes, prefix)
+    return prefix
+
+def get_output_format(app_name, schema_bytes):
+    """
+    Return the Ollama `format` value that constrains change output for an app
+    
+    Ollama 0.5+ accepts the JSON Schema itself and constrains decoding to it,
+    so the model can only emit schema-shaped JSON. Older servers fall back
+    to generic JSON mode.
+    
+    Args:
+        app_name: Application name
+        schema_bytes: Raw JSON Schema as served by the schema service
+    
+    Returns:
+        Parsed JSON Schema, or 'json'
+    """
+    if not supports_structured_outputs():
+        return 'json'
+    
+    cached = _OUTPUT_FORMATS.get(app_name)
+    if cached and cached[0] == schema_bytes:
+        return cached[1]
+    
+    schema = orjson.loads(schema_bytes)
+    _OUTPUT_FORMATS[app_name] = (schema_bytes, schema)
+    return schema
 
+def supports_structured_outputs():
+    """Check whether the Ollama server accepts a JSON Schema as `format`"""
+    try:
+        return _ollama_version() >= STRUCTURED_OUTPUTS_VERSION
+    except Exception as e:
+        print(f"Could not determine Ollama version, using JSON mode: {e}")
+        return False
+
+@functools.lru_cache(maxsize=1)
+def _ollama_version():
+    """Fetch the Ollama server version as a tuple; failures are not cached"""
+    response = SESSION.get(f'{OLLAMA_URL}/api/version', timeout=5)
+    response.raise_for_status()
+    version = orjson.loads(response.content).get('version', '')
+    match = re.match(r'(\d+)\.(\d+)\.(\d+)', version)
+    if not match:
+        raise ValueError(f"unrecognized Ollama version '{version}'")
+    return tuple(int(part) for part in match.groups())
+
+def get_validator(schema_bytes):
+    """
+    Return a compiled validator for a JSON Schema, compiling it on first use
+    
+    fastjsonschema generates Python code specialized to the schema, so each
+    schema version is compiled once and reused. Defaults are not injected,
+    so validation never alters the configuration it checks.
+    
+    Args:
+        schema_bytes: Raw JSON Schema as served by the schema service
+    
+    Returns:
+        Validator callable, or None if the schema could not be compiled
+    """
+    key = hashlib.sha1(schema_bytes).hexdigest()
+    if key not in _VALIDATORS:
+        try:
+            _VALIDATORS[key] = fastjsonschema.compile(orjson.loads(schema_bytes), use_default=False)
+        except fastjsonschema.JsonSchemaDefinitionException as e:
+            print(f"Could not compile schema validator, skipping validation: {e}")
+            _VALIDATORS[key] = None
+    return _VALIDATORS[key]
+
+def validation_error(validate, values):
+    """Return the schema violation message for values, or None if they are valid"""
+    if validate is None:
+        return None
+    try:
+        validate(values)
+        return None
+    except fastjsonschema.JsonSchemaValueException as e:
+        return e.message
+
+def estimate_tokens(text):
+    """Roughly estimate the token count of JSON-heavy text (~3 chars per token)"""
+    return len(text) // 3
+
+def context_size(prompt, num_predict):
+    """
+    Pick num_ctx for a generate call
+    
+    Uses the smallest power of two that fits the estimated prompt plus the
+    decode budget, but never shrinks below the largest size used so far:
+    Ollama reloads the model whenever num_ctx changes, which would also
+    throw away the cached prompt prefix.
+    """
+    global _num_ctx
+    needed = estimate_tokens(prompt) + num_predict
+    with _NUM_CTX_LOCK:
+        while _num_ctx < needed and _num_ctx < MAX_NUM_CTX:
+            _num_ctx *= 2
+        return _num_ctx
+
+def change_token_budget(values_text):
+    """
+    Size num_predict for a configuration change from the current values
+    
+    The answer is the full modified values JSON, so allow about twice its
+    estimated size, bounded to [MIN_CHANGE_TOKENS, MAX_CHANGE_TOKENS].
+    """
+    return max(MIN_CHANGE_TOKENS, min(MAX_CHANGE_TOKENS, estimate_tokens(values_text) * 2))
+
+def apply_configuration_change(user_input, prompt_prefix, values_text, output_format='json', previous_error=None):
+    """
+    Use LLM to apply configuration changes to the values JSON
+    
+    Args:
+        user_input: Natural language user request
+        prompt_prefix: Static prompt head from get_prompt_prefix
+        values_text: Current configuration values as JSON text
+        output_format: Ollama `format` value from get_output_format
+        previous_error: Schema violation in a rejected earlier answer, if retrying
+    
+    Returns:
+        Updated values JSON or None
+    """
+    prompt = f"""{prompt_prefix}
+Current configuration (JSON):
+{values_text}
+
+User request: "{user_input}"
+"""
+    if previous_error:
+        prompt += f"""
+Your previous answer was rejected by the JSON Schema: {previous_error}
+Apply the request again and make sure the result satisfies the schema.
+"""
+    prompt += """
 Modified JSON:"""
 
+    num_predict = change_token_budget(values_text)
+    scanner = _JsonObjectScanner()
     try:
-        response = requests.post(
-            f'{OLLAMA_URL}/api/generate',
-            json={
-                'model': 'llama3.2',
-                'prompt': prompt,
-                'stream': False,
-                'options': {
-                    'temperature': 0.1,
-                    'num_predict': 4096
-                }
-            },
-            timeout=120
-        )
+        response = _generate_change(prompt, num_predict, output_format)
+        if response.status_code != 200 and output_format != 'json':
+            print(f"Ollama rejected schema-constrained output ({response.status_code}), falling back to JSON mode")
+            response.close()
+            response = _generate_change(prompt, num_predict, 'json')
         
-        if response.status_code == 200:
-            result = response.json()
-            json_response = result.get('response', '').strip()
-            
-            start_idx = json_response.find('{')
-            end_idx = json_response.rfind('}')
-            
-            if start_idx != -1 and end_idx != -1:
-                json_str = json_response[start_idx:end_idx+1]
-                
-                updated_values = json.loads(json_str)
-                print("Successfully parsed updated configuration")
-                return updated_values
-            else:
-                print("Could not find valid JSON in LLM response")
+        with response:
+            if response.status_code != 200:
+                print(f"Error from Ollama: {response.status_code}")
                 return None
-                
-        else:
-            print(f"Error from Ollama: {response.status_code}")
+            
+            # Stop reading (and let Ollama stop generating) once the object closes
+            json_str = None
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = orjson.loads(line)
+                json_str = scanner.feed(chunk.get('response', ''))
+                if json_str is not None or chunk.get('done'):
+                    break
+        
+        if json_str is None:
+            print("Could not find valid JSON in LLM response")
             return None
+        
+        updated_values = orjson.loads(json_str)
+        print("Successfully parsed updated configuration")
+        return updated_values
             
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         print(f"Error parsing JSON from LLM response: {e}")
-        print(f"Response was: {json_response[:500]}")
+        print(f"Response was: {scanner.text()[:500]}")
         return None
     except Exception as e:
         print(f"Error applying configuration change: {e}")
         return None
 
+def _generate_change(prompt, num_predict, output_format):
+    """Start a streaming generate call for a configuration change"""
+    return SESSION.post(
+        f'{OLLAMA_URL}/api/generate',
+        json={
+            'model': MODEL_NAME,
+            'prompt': prompt,
+            'stream': True,
+            'format': output_format,
+            'keep_alive': OLLAMA_KEEP_ALIVE,
+            'options': {
+                'temperature': 0.1,
+                'num_predict': num_predict,
+                'num_ctx': context_size(prompt, num_predict),
+                'stop': CHANGE_STOP_SEQUENCES
+            }
+        },
+        stream=True,
+        timeout=120
+    )
+
+class _JsonObjectScanner:
+    """
+    Incrementally locate the first complete top-level JSON object in streamed text
+    
+    Each fed chunk is scanned once with a compiled regex that stops only on
+    braces, quotes and backslashes, tracking brace depth and skipping braces
+    that appear inside JSON strings.
+    """
+    
+    def __init__(self):
+        self._chunks = []
+        self._length = 0
+        self._start = -1
+        self._depth = 0
+        self._in_string = False
+        self._skip_until = 0
+    
+    def text(self):
+        """Return all text fed so far"""
+        return ''.join(self._chunks)
+    
+    def feed(self, chunk):
+        """
+        Append a chunk of generated text and scan it
+        
+        Returns:
+            Text of the first complete JSON object, or None while it is still open
+        """
+        offset = self._length
+        self._chunks.append(chunk)
+        self._length += len(chunk)
+        
+        for match in _JSON_TOKEN_RE.finditer(chunk):
+            i = offset + match.start()
+            if i < self._skip_until:
+                continue
+            ch = match.group()
+            if self._start == -1:
+                if ch == '{':
+                    self._start = i
+                    self._depth = 1
+            elif self._in_string:
+                if ch == '\\':
+                    # The escaped character may arrive in the next chunk
+                    self._skip_until = i + 2
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == '{':
+                self._depth += 1
+            elif ch == '}':
+                self._depth -= 1
+                if self._depth == 0:
+                    return self.text()[self._start:i + 1]
+        return None
+
+def _extract_json(text):
+    """
+    Return the first complete top-level JSON object in text
+    
+    Unlike slicing from the first '{' to the last '}', trailing text that
+    itself contains braces is ignored.
+    
+    Returns:
+        JSON object text, or None if no object is closed in text
+    """
+    return _JsonObjectScanner().feed(text)
+
+def _change_cache_key(app_name, schema_bytes, values_bytes, user_input):
+    """
+    Build the change cache key for a request against the current app state
+    
+    The schema and values are keyed by content digest so any edit to either
+    file naturally misses the entries computed against the old state.
+    """
+    return (
+        app_name,
+        hashlib.sha256(schema_bytes).hexdigest(),
+        hashlib.sha256(values_bytes).hexdigest(),
+        ' '.join(user_input.split())
+    )
+
+def _get_cached_change(key):
+    """Return a previously computed configuration for key, or None"""
+    with _CHANGE_CACHE_LOCK:
+        updated_values = _CHANGE_CACHE.get(key)
+        if updated_values is not None:
+            _CHANGE_CACHE.move_to_end(key)
+        return updated_values
+
+def _put_cached_change(key, updated_values):
+    """Store a computed configuration, evicting the least recently used entry"""
+    with _CHANGE_CACHE_LOCK:
+        _CHANGE_CACHE[key] = updated_values
+        _CHANGE_CACHE.move_to_end(key)
+        if len(_CHANGE_CACHE) > CHANGE_CACHE_MAX:
+            _CHANGE_CACHE.popitem(last=False)
+
+def conditional_get(url, timeout=10):
+    """
+    GET a URL, revalidating any previously fetched body with its validators
+    
+    Sends If-None-Match / If-Modified-Since from the last 200 response and
+    answers a 304 Not Modified with that stored response.
+    
+    Args:
+        url: URL to fetch
+        timeout: Request timeout in seconds
+    
+    Returns:
+        requests.Response with the current body
+    """
+    cached = _CONDITIONAL_CACHE.get(url)
+    headers = {}
+    if cached is not None:
+        if 'ETag' in cached.headers:
+            headers['If-None-Match'] = cached.headers['ETag']
+        if 'Last-Modified' in cached.headers:
+            headers['If-Modified-Since'] = cached.headers['Last-Modified']
+    
+    response = SESSION.get(url, headers=headers, timeout=timeout)
+    if response.status_code == 304 and cached is not None:
+        return cached
+    
+    if response.status_code == 200 and ('ETag' in response.headers or 'Last-Modified' in response.headers):
+        _CONDITIONAL_CACHE[url] = response
+    return response
+
+def fetch_app_config(app_name):
+    """
+    Start fetching the schema and current values for an application concurrently
+    
+    Args:
+        app_name: Application name (chat, matchmaking, or tournament)
+    
+    Returns:
+        Tuple of (schema_future, values_future) resolving to HTTP responses
+    """
+    schema_future = EXECUTOR.submit(conditional_get, f'{SCHEMA_SERVICE_URL}/{app_name}')
+    values_future = EXECUTOR.submit(conditional_get, f'{VALUES_SERVICE_URL}/{app_name}')
+    return schema_future, values_future
+
+def guess_application(user_input):
+    """
+    Cheaply guess the target application before identification finishes
+    
+    Uses the keyword match when there is one, otherwise the application the
+    previous request resolved to.
+    
+    Returns:
+        Guessed application name, or None
+    """
+    return _match_application(user_input.lower()) or _last_app_name
+
+def _discard_fetches(fetches):
+    """Cancel speculative fetches that have not started; started ones just finish"""
+    if fetches:
+        for future in fetches:
+            future.cancel()
+
 @app.route('/message', methods=['POST'])
 def handle_message():
     """
@@ -242,35 +816,59 @@ def handle_message():
         user_input = data['input']
         print(f"\n=== Processing request: {user_input} ===")
         
+        # Start fetching for a cheap guess while identification (maybe an LLM call) runs
+        guess = guess_application(user_input)
+        prefetch = None
+        if guess:
+            print(f"Prefetching schema and current values for {guess}...")
+            prefetch = fetch_app_config(guess)
+        
         app_name = identify_application(user_input)
         if not app_name:
+            _discard_fetches(prefetch)
             return jsonify({
                 'error': 'Could not identify application from request',
                 'hint': 'Please mention one of: chat, matchmaking, or tournament'
             }), 400
         
-        print(f"Fetching schema for {app_name}...")
-        schema_response = requests.get(f'{SCHEMA_SERVICE_URL}/{app_name}', timeout=10)
+        global _last_app_name
+        _last_app_name = app_name
+        
+        if prefetch and guess == app_name:
+            schema_future, values_future = prefetch
+        else:
+            if prefetch:
+                print(f"Speculative prefetch for {guess} missed, dropping it")
+                _discard_fetches(prefetch)
+            print(f"Fetching schema and current values for {app_name}...")
+            schema_future, values_future = fetch_app_config(app_name)
+        schema_response = schema_future.result()
+        values_response = values_future.result()
+        
         if schema_response.status_code != 200:
             return jsonify({
                 'error': f'Could not fetch schema for {app_name}',
-                'details': schema_response.json()
+                'details': orjson.loads(schema_response.content)
             }), 404
         
-        schema = schema_response.json()
-        
-        print(f"Fetching current values for {app_name}...")
-        values_response = requests.get(f'{VALUES_SERVICE_URL}/{app_name}', timeout=10)
         if values_response.status_code != 200:
             return jsonify({
                 'error': f'Could not fetch values for {app_name}',
-                'details': values_response.json()
+                'details': orjson.loads(values_response.content)
             }), 404
         
-        current_values = values_response.json()
+        cache_key = _change_cache_key(app_name, schema_response.content, values_response.content, user_input)
+        updated_values = _get_cached_change(cache_key)
+        if updated_values is not None:
+            print("Reusing cached configuration change")
+            return jsonify(updated_values), 200
     
+        prompt_prefix = get_prompt_prefix(app_name, schema_response.content)
+        values_text = values_response.content.decode('utf-8')
+        output_format = get_output_format(app_name, schema_response.content)
+        
         print("Applying configuration change...")
-        updated_values = apply_configuration_change(user_input, schema, current_values)
+        updated_values = apply_configuration_change(user_input, prompt_prefix, values_text, output_format)
         
         if not updated_values:
             return jsonify({
@@ -278,6 +876,21 @@ def handle_message():
                 'hint': 'The LLM could not parse or apply your request'
             }), 500
         
+        validate = get_validator(schema_response.content)
+        error = validation_error(validate, updated_values)
+        if error:
+            print(f"LLM output failed schema validation ({error}), retrying...")
+            updated_values = apply_configuration_change(
+                user_input, prompt_prefix, values_text, output_format, previous_error=error
+            )
+            error = validation_error(validate, updated_values) if updated_values else 'no valid JSON returned'
+            if error:
+                return jsonify({
+                    'error': 'Updated configuration does not match the schema',
+                    'details': error
+                }), 500
+        
+        _put_cached_change(cache_key, updated_values)
         print("Configuration updated successfully!")
         return jsonify(updated_values), 200
         
@@ -302,7 +915,6 @@ if __name__ == '__main__':
     
     print(f"Starting Bot Service on {host}:{port}")
 
-    if wait_for_ollama():
-        ensure_model_pulled('llama3.2')
+    prepare_ollama()
     
     app.run(host=host, port=port, debug=False)
\ No newline at end of file
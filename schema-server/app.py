@@ -1,11 +1,39 @@
-from flask import Flask, jsonify
-import json
+from flask import Flask, jsonify, send_file
+from flask.json.provider import JSONProvider
+import orjson
+import mmap
 import os
 import argparse
 
+class OrjsonProvider(JSONProvider):
+    """Serialize Flask JSON with orjson, compact and unsorted"""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj), mimetype='application/json')
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
+
+SCHEMA_DIR = os.environ.get('SCHEMA_DIR', '/data/schemas')
+
+# Last validated file mtime per application, keyed by app name
+_CACHE = {}
 
-SCHEMA_DIR = '/data/schemas'
+def _parse_json_file(filepath):
+    """Parse a JSON file straight from a read-only memory map of it"""
+    with open(filepath, 'rb') as f:
+        # mmap refuses empty files; let orjson reject those as invalid JSON
+        if os.fstat(f.fileno()).st_size == 0:
+            return orjson.loads(f.read())
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            return orjson.loads(view)
 
 @app.route('/<app_name>', methods=['GET'])
 def get_schema(app_name):
@@ -17,21 +45,31 @@ def get_schema(app_name):
     
     Returns:
         200: JSON Schema
+        304: Not modified since the client's cached copy
         404: Schema not found
         500: Internal server error
     """
     try:
         filepath = os.path.join(SCHEMA_DIR, f'{app_name}.schema.json')
 
-        if not os.path.exists(filepath):
+        try:
+            st = os.stat(filepath)
+        except FileNotFoundError:
             return jsonify({'error': f'Schema not found for application: {app_name}'}), 404
         
-        with open(filepath, 'r') as f:
-            schema = json.load(f)
+        if _CACHE.get(app_name) != st.st_mtime_ns:
+            _parse_json_file(filepath)
+            _CACHE[app_name] = st.st_mtime_ns
         
-        return jsonify(schema), 200
+        return send_file(
+            os.path.abspath(filepath),
+            mimetype='application/json',
+            conditional=True,
+            etag=True,
+            last_modified=st.st_mtime
+        )
         
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         return jsonify({'error': f'Invalid JSON in schema file: {str(e)}'}), 500
     except Exception as e:
         return jsonify({'error': f'Internal server error: {str(e)}'}), 500
@@ -43,7 +81,7 @@ def health():
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Schema Service')
-    parser.add_argument('--schema-dir', default='/data/schemas', help='Directory containing schema files')
+    parser.add_argument('--schema-dir', default=SCHEMA_DIR, help='Directory containing schema files')
     parser.add_argument('--listen', default='0.0.0.0:5001', help='Host:Port to listen on')
     
     args = parser.parse_args()